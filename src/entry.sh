@@ -2,4 +2,8 @@
 
 exec uvicorn etos_api.main:APP \
 	--host 0.0.0.0 \
-	--port 8080
+	--port 8080 \
+	--loop uvloop \
+	--http httptools \
+	--timeout-keep-alive 30 \
+	--backlog 4096
@@ -3,4 +3,6 @@
 exec uvicorn etos_api.main:APP \
 	--host 0.0.0.0 \
 	--port 8004 \
+	--loop uvloop \
+	--http httptools \
 	--reload
@@ -0,0 +1,64 @@
+# Copyright 2021 Axis Communications AB.
+#
+# For a full list of individual contributors, please see the commit history.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Clients that are shared by all requests to the ETOS API."""
+import os
+import aiohttp
+from etos_lib import ETOS
+
+ETOS_LIBRARY = ETOS("ETOS API", os.getenv("HOSTNAME"), "ETOS API")
+_HTTP_SESSION = None
+_PROXIED_HTTP_SESSION = None
+
+
+def http_session():
+    """HTTP client session that is shared by all requests.
+
+    The session is created on first use, in the event loop that is running
+    the request, and is kept open until 'close_http_session' is called.
+
+    :return: Shared HTTP client session.
+    :rtype: :obj:`aiohttp.ClientSession`
+    """
+    global _HTTP_SESSION  # pylint:disable=global-statement
+    if _HTTP_SESSION is None or _HTTP_SESSION.closed:
+        _HTTP_SESSION = aiohttp.ClientSession()
+    return _HTTP_SESSION
+
+
+def proxied_http_session():
+    """HTTP client session, using proxy settings from the environment, shared by all requests.
+
+    Used for requests to URLs given by the users, such as test suites, which
+    may be outside of the cluster. The session is created on first use and is
+    kept open until 'close_http_session' is called.
+
+    :return: Shared HTTP client session with 'trust_env' set.
+    :rtype: :obj:`aiohttp.ClientSession`
+    """
+    global _PROXIED_HTTP_SESSION  # pylint:disable=global-statement
+    if _PROXIED_HTTP_SESSION is None or _PROXIED_HTTP_SESSION.closed:
+        _PROXIED_HTTP_SESSION = aiohttp.ClientSession(trust_env=True)
+    return _PROXIED_HTTP_SESSION
+
+
+async def close_http_session():
+    """Close the shared HTTP client sessions that have been created."""
+    global _HTTP_SESSION, _PROXIED_HTTP_SESSION  # pylint:disable=global-statement
+    sessions = (_HTTP_SESSION, _PROXIED_HTTP_SESSION)
+    _HTTP_SESSION = _PROXIED_HTTP_SESSION = None
+    for session in sessions:
+        if session is not None:
+            await session.close()
@@ -29,50 +29,22 @@ class ContextLogging(logging.Logger):
 
     This context based logging module replaces the FORMAT_CONFIG
     with a ContextVar instead, which works with asyncio, and calls
-    get for each logging method called.
+    get for each log record that is emitted.
     """
 
     identifier = ContextVar("identifier")
 
-    def critical(self, msg, *args, **kwargs):
-        """Add identifier to critical calls.
+    def _log(self, level, msg, args, **kwargs):  # pylint:disable=arguments-differ
+        """Add identifier to all logging calls that are not filtered out by level.
 
-        For documentation read :obj:`logging.Logger.critical`
-        """
-        FORMAT_CONFIG.identifier = self.identifier.get("Main")  # Default=Main
-        return super().critical(msg, *args, **kwargs)
-
-    def error(self, msg, *args, **kwargs):
-        """Add identifier to error calls.
-
-        For documentation read :obj:`logging.Logger.error`
-        """
-        FORMAT_CONFIG.identifier = self.identifier.get("Main")  # Default=Main
-        return super().error(msg, *args, **kwargs)
-
-    def warning(self, msg, *args, **kwargs):
-        """Add identifier to warning calls.
-
-        For documentation read :obj:`logging.Logger.warning`
-        """
-        FORMAT_CONFIG.identifier = self.identifier.get("Main")  # Default=Main
-        return super().warning(msg, *args, **kwargs)
-
-    def info(self, msg, *args, **kwargs):
-        """Add identifier to info calls.
-
-        For documentation read :obj:`logging.Logger.info`
-        """
-        FORMAT_CONFIG.identifier = self.identifier.get("Main")  # Default=Main
-        return super().info(msg, *args, **kwargs)
-
-    def debug(self, msg, *args, **kwargs):
-        """Add identifier to debug calls.
+        All logging methods, including 'exception' and 'log', end up here once
+        the level check has passed, so the identifier is only read for records
+        that are emitted.
 
-        For documentation read :obj:`logging.Logger.debug`
+        For documentation read :obj:`logging.Logger._log`
         """
         FORMAT_CONFIG.identifier = self.identifier.get("Main")  # Default=Main
-        return super().debug(msg, *args, **kwargs)
+        return super()._log(level, msg, args, **kwargs)
 
 
 logging.setLoggerClass(ContextLogging)
@@ -15,39 +15,100 @@
 # limitations under the License.
 """Graphql query handler."""
 import asyncio
+from functools import lru_cache
+import aiohttp
 from gql import gql, AIOHTTPTransport, Client
 
 
-class GraphqlQueryHandler:  # pylint:disable=too-few-public-methods
-    """Handle Graphql queries."""
+@lru_cache(maxsize=1024)
+def parse_query(query):
+    """Parse a graphql query, reusing the document if the query was parsed before.
+
+    :param query: Query to parse.
+    :type query: str
+    :return: Parsed query document.
+    :rtype: :obj:`graphql.DocumentNode`
+    """
+    return gql(query)
+
+
+class GraphqlQueryHandler:
+    """Handle Graphql queries.
+
+    The handler keeps a single GraphQL session open between 'connect' and 'close'
+    so that the HTTP connections are reused by all queries. Use it as an async
+    context manager to open and close the session.
+
+    The schema is not fetched from the server, so queries are validated by the
+    server only.
+    """
 
     def __init__(self, etos):
-        """Initialize the async io transport.
+        """Initialize the query handler.
+
+        The transport is not created until the session is opened.
 
         :param etos: ETOS Library instance.
         :type etos: :obj:`etos_lib.ETOS`
         """
         self.etos = etos
-        self.transport = AIOHTTPTransport(
-            url=self.etos.debug.graphql_server,
-            timeout=self.etos.debug.default_http_timeout,
-            client_session_args={"trust_env": True},
-        )
+        self.client = None
+        self.session = None
+
+    async def connect(self):
+        """Open the GraphQL session, unless it is already open.
+
+        Opening the session does not yield to the event loop, so concurrent
+        callers can not open more than one session.
+        """
+        if self.session is None:
+            self.client = Client(
+                transport=AIOHTTPTransport(
+                    url=self.etos.debug.graphql_server,
+                    timeout=self.etos.debug.default_http_timeout,
+                    client_session_args={
+                        "trust_env": True,
+                        # Polling queries the same server over and over, so
+                        # keep its connections and DNS lookups for longer.
+                        "connector": aiohttp.TCPConnector(
+                            ttl_dns_cache=300, keepalive_timeout=60
+                        ),
+                    },
+                ),
+                fetch_schema_from_transport=False,
+                execute_timeout=self.etos.debug.default_wait_timeout,
+            )
+            self.session = await self.client.__aenter__()
+
+    async def close(self):
+        """Close the GraphQL session, if it is open."""
+        if self.session is not None:
+            self.session = None
+            await self.client.__aexit__(None, None, None)
+
+    async def __aenter__(self):
+        """Open the GraphQL session."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the GraphQL session."""
+        await self.close()
 
-    async def execute(self, query):
+    async def execute(self, query, variables=None):
         """Execute a graphql query.
 
         :param query: Query to execute.
         :type query: str
+        :param variables: Values of the variables in the query.
+        :type variables: dict
         :return: Response from GraphQL.
         :rtype: dict
         """
-        async with Client(
-            transport=self.transport,
-            fetch_schema_from_transport=True,
-            execute_timeout=self.etos.debug.default_wait_timeout,
-        ) as session:
-            try:
-                return await session.execute(gql(query))
-            except asyncio.exceptions.TimeoutError:
-                return None
+        await self.connect()
+        try:
+            return await self.session.execute(
+                parse_query(query), variable_values=variables
+            )
+        except asyncio.exceptions.TimeoutError:
+            return None
@@ -15,9 +15,12 @@
 # limitations under the License.
 """Event repository queries."""
 
-ARTIFACT_IDENTITY_QUERY = """
-{
-  artifactCreated(search: "{'data.identity': {'$regex': '%s'}}", last: 1) {
+# The query document is the same for all searches, so that it is parsed once
+# and so that the server sees the same query every time. The search filter is
+# passed as a variable.
+ARTIFACT_CREATED_QUERY = """
+query ArtifactCreated($search: String) {
+  artifactCreated(search: $search, last: 1) {
     edges {
       node {
         data {
@@ -32,19 +35,5 @@ ARTIFACT_IDENTITY_QUERY = """
 }
 """
 
-VERIFY_ARTIFACT_ID_EXISTS = """
-{
-  artifactCreated(search: "{'meta.id': '%s'}", last: 1) {
-    edges {
-      node {
-        data {
-          identity
-        }
-        meta {
-          id
-        }
-      }
-    }
-  }
-}
-"""
+ARTIFACT_IDENTITY_SEARCH = "{'data.identity': {'$regex': '%s'}}"
+ARTIFACT_ID_SEARCH = "{'meta.id': '%s'}"
@@ -15,18 +15,13 @@
 # limitations under the License.
 """ETOS API utilities."""
 import asyncio
-import sys
-import functools
-from inspect import iscoroutinefunction
-from contextlib import asynccontextmanager
+import math
+import random
 
 
 async def sync_to_async(function, *args, **kwargs):
     """Convert synchronous method to async, using threads.
 
-    Credit for this function goes to https://github.com/django/asgiref
-    and their SyncToAsync class.
-
     :param function: Function or method to call.
     :type function: function
     :param args: Positional arguments to function call.
@@ -36,50 +31,39 @@ async def sync_to_async(function, *args, **kwargs):
     :return: Return value from function call.
     :rtype: Any
     """
+    return await asyncio.to_thread(function, *args, **kwargs)
 
-    def thread_exception_handler(exception_info, function, *args, **kwargs):
-        """Call function and handle its exceptions properly.
-
-        :param exception_info: If there's an exception, run the function inside
-                               the except block so that exc_info is populated correctly.
-        :type exception_info: tuple
-        :param function: Function or method to call.
-        :type function: function
-        :param args: Positional arguments to function call.
-        :type args: tuple
-        :param kwargs: Keyword arguments to function call.
-        :type kwargs: dict
-        :return: Return value from function call.
-        :rtype: Any
-        """
-        if exception_info[1]:
-            try:
-                raise exception_info[1]
-            except:  # pylint: disable=bare-except
-                return function(*args, **kwargs)
-        return function(*args, **kwargs)
-
-    loop = asyncio.get_event_loop()
-    future = loop.run_in_executor(
-        None,  # Default executor.
-        functools.partial(
-            thread_exception_handler, sys.exc_info(), function, *args, **kwargs
-        ),
-    )
-    return await asyncio.wait_for(future, timeout=None)
 
+def retry_delay(attempt, base=0.25, cap=4.0, retry_after=None, jitter=0.25):
+    """Get the time to wait before retrying a request.
 
-@asynccontextmanager
-async def aclosing(thing):
-    """Asynchronous closing context manager.
+    The delay grows exponentially with each attempt, up to 'cap', with up to
+    'jitter' seconds of random jitter so that retries from concurrent
+    requests are spread out. A longer 'Retry-After' header, in seconds, from
+    the server takes precedence, but the delay is never shorter than the
+    backoff. Callers must still cap the delay to their own deadline, since
+    the server may ask for any delay.
 
-    :param thing: Thing to close.
-    :type thing: Any
+    :param attempt: Number of attempts that have failed so far, minus one.
+    :type attempt: int
+    :param base: Delay after the first failed attempt (seconds).
+    :type base: float
+    :param cap: Maximum delay, not counting the jitter (seconds).
+    :type cap: float
+    :param retry_after: Value of the 'Retry-After' header of the last response.
+    :type retry_after: str or None
+    :param jitter: Maximum random jitter to add to the delay (seconds).
+    :type jitter: float
+    :return: Time to wait before the next attempt (seconds).
+    :rtype: float
     """
-    try:
-        yield thing
-    finally:
-        if iscoroutinefunction(thing.close):
-            await thing.close()
+    backoff = min(cap, base * 2 ** attempt)
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            pass  # An HTTP-date, which is not supported. Use the backoff instead.
         else:
-            await sync_to_async(thing.close)
+            if math.isfinite(delay):
+                return max(delay, backoff)
+    return backoff + random.uniform(0, jitter)
@@ -14,11 +14,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """ETOS API suite validator module."""
+import hashlib
 import logging
+from collections import OrderedDict
 from uuid import UUID
 from typing import Union, List
 from pydantic import BaseModel, validator, ValidationError, constr, conlist
-import requests
+import orjson
+from etos_api.library.clients import proxied_http_session
+
+VALIDATED_SUITES_SIZE = 1024
+# Digests of suites that have passed validation, oldest first.
+_VALIDATED_SUITES = OrderedDict()
 
 
 class Environment(BaseModel):
@@ -93,6 +100,7 @@ class Recipe(BaseModel):
         "EXECUTE": Execute,
         "TEST_RUNNER": TestRunner,
     }
+    __constraint_keys = tuple(__constraint_models)
 
     @validator("constraints")
     def validate_constraints(
@@ -114,26 +122,29 @@ class Recipe(BaseModel):
         :return: Same as value, if validated.
         :rtype: Any
         """
-        count = dict.fromkeys(cls.__constraint_models.keys(), 0)
+        seen = set()
+        duplicates = set()
         for constraint in value:
             model = cls.__constraint_models.get(constraint.key)
             if model is None:
                 raise TypeError(
                     "Unknown key %r, valid keys: %r"
-                    % (constraint.key, tuple(cls.__constraint_models.keys()))
+                    % (constraint.key, cls.__constraint_keys)
                 )
             try:
-                model(**constraint.dict())
+                model(key=constraint.key, value=constraint.value)
             except ValidationError as exception:
                 raise ValueError(str(exception)) from exception
-            count[constraint.key] += 1
-        more_than_one = [key for key, number in count.items() if number > 1]
-        if more_than_one:
+            if constraint.key in seen:
+                duplicates.add(constraint.key)
+            seen.add(constraint.key)
+        if duplicates:
+            more_than_one = [key for key in cls.__constraint_keys if key in duplicates]
             raise ValueError(
                 "Too many instances of keys %r. Only 1 allowed." % more_than_one
             )
-        missing = [key for key, number in count.items() if number == 0]
-        if missing:
+        if len(seen) < len(cls.__constraint_keys):
+            missing = [key for key in cls.__constraint_keys if key not in seen]
             raise ValueError(
                 "Too few instances of keys %r. At least 1 required." % missing
             )
@@ -151,6 +162,7 @@ class Suite(BaseModel):
 class SuiteValidator:  # pylint:disable=too-few-public-methods
     """Validate ETOS suite definitions to make sure they are executable."""
 
+    __slots__ = ()
     logger = logging.getLogger(__name__)
 
     async def _download_suite(self, test_suite_url):
@@ -162,13 +174,15 @@ class SuiteValidator:  # pylint:disable=too-few-public-methods
         :rtype: list
         """
         try:
-            suite = requests.get(test_suite_url)
-            suite.raise_for_status()
+            async with proxied_http_session().get(test_suite_url) as response:
+                response.raise_for_status()
+                suite = await response.read()
         except Exception as exception:  # pylint:disable=broad-except
             raise AssertionError(
                 "Unable to download suite from %r" % test_suite_url
             ) from exception
-        return suite.json()
+        # Parse the body directly, skipping the text decoding in aiohttp.
+        return orjson.loads(suite)
 
     async def validate(self, test_suite_url):
         """Validate the ETOS suite definition.
@@ -178,5 +192,17 @@ class SuiteValidator:  # pylint:disable=too-few-public-methods
         :raises ValidationError: If the suite did not validate.
         """
         downloaded_suite = await self._download_suite(test_suite_url)
+        # The same suite is often started many times over, so suites that
+        # have already passed validation are recognized by their digest.
+        digest = hashlib.blake2b(
+            orjson.dumps(downloaded_suite, option=orjson.OPT_SORT_KEYS),
+            digest_size=16,
+        ).digest()
+        if digest in _VALIDATED_SUITES:
+            _VALIDATED_SUITES.move_to_end(digest)
+            return
         for suite in downloaded_suite:
             assert Suite(**suite)
+        _VALIDATED_SUITES[digest] = None
+        if len(_VALIDATED_SUITES) > VALIDATED_SUITES_SIZE:
+            _VALIDATED_SUITES.popitem(last=False)
@@ -16,12 +16,15 @@
 """ETOS API."""
 import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.responses import RedirectResponse
 from etos_api import routers
+from etos_api.library.clients import close_http_session
 
 
-APP = FastAPI()
+APP = FastAPI(default_response_class=ORJSONResponse)
 LOGGER = logging.getLogger(__name__)
+APP.add_event_handler("shutdown", close_http_session)
 
 
 @APP.post("/")
@@ -16,13 +16,15 @@
 """Environment provider proxy API."""
 import logging
 import asyncio
-import os
-import time
-import aiohttp
+import orjson
 from fastapi import APIRouter, HTTPException
-from etos_lib import ETOS
+from etos_api.library.clients import ETOS_LIBRARY, http_session
+from etos_api.library.utilities import retry_delay
 
-from .schemas import ConfigureEnvironmentProviderRequest
+from .schemas import (
+    ConfigureEnvironmentProviderDict,
+    ConfigureEnvironmentProviderRequest,
+)
 
 ROUTER = APIRouter()
 LOGGER = logging.getLogger(__name__)
@@ -34,45 +36,56 @@ async def _wait_for_configuration(etos_library, environment):
     :param etos_library: An ETOS library instance for requesting the environment provider.
     :type etos_library: :obj:`etos_lib.ETOS`
     :param environment: Environment that has been configured.
-    :type environment: :obj:`etos_api.routers.etos.schemas.ConfigureEnvironmentProviderRequest`
+    :type environment: :obj:`.schemas.ConfigureEnvironmentProviderDict`
     """
-    LOGGER.info("Waiting for configuration to be applied in the environment provider.")
-    end_time = time.time() + etos_library.debug.default_http_timeout
+    LOGGER.debug("Waiting for configuration to be applied in the environment provider.")
+    loop = asyncio.get_running_loop()
+    end_time = loop.time() + etos_library.debug.default_http_timeout
     LOGGER.debug("Timeout: %r", etos_library.debug.default_http_timeout)
-    async with aiohttp.ClientSession() as session:
-        while time.time() < end_time:
-            try:
-                async with session.get(
-                    f"{etos_library.debug.environment_provider}/configure",
-                    params={"suite_id": environment.suite_id},
-                    headers={
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                    },
-                ) as response:
-                    assert 200 <= response.status < 400
-                    response_json = await response.json()
-                    LOGGER.info("Configuration: %r", response_json)
-                    assert response_json.get("dataset") is not None
-                    assert response_json.get("iut_provider") is not None
-                    assert response_json.get("log_area_provider") is not None
-                    assert response_json.get("execution_space_provider") is not None
-                break
-            except AssertionError:
-                if response.status < 400:
-                    LOGGER.warning("Configuration not ready yet.")
-                else:
-                    LOGGER.warning(
-                        "Configuration verification request failed: %r, %r",
-                        response.status,
-                        response.reason,
-                    )
-                await asyncio.sleep(2)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Environment provider configuration did not apply properly",
+    session = http_session()
+    attempt = 0
+    while loop.time() < end_time:
+        try:
+            async with session.get(
+                f"{etos_library.debug.environment_provider}/configure",
+                params={"suite_id": environment["suite_id"]},
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+            ) as response:
+                assert 200 <= response.status < 400
+                response_json = await response.json()
+                LOGGER.debug("Configuration: %r", response_json)
+                assert response_json.get("dataset") is not None
+                assert response_json.get("iut_provider") is not None
+                assert response_json.get("log_area_provider") is not None
+                assert response_json.get("execution_space_provider") is not None
+            break
+        except AssertionError:
+            if response.status < 400:
+                LOGGER.warning("Configuration not ready yet.")
+            else:
+                LOGGER.warning(
+                    "Configuration verification request failed: %r, %r",
+                    response.status,
+                    response.reason,
+                )
+            # Never sleep past the deadline, whatever Retry-After says.
+            await asyncio.sleep(
+                min(
+                    retry_delay(
+                        attempt, retry_after=response.headers.get("Retry-After")
+                    ),
+                    max(0.0, end_time - loop.time()),
+                )
             )
+            attempt += 1
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Environment provider configuration did not apply properly",
+        )
 
 
 @ROUTER.post(
@@ -86,35 +99,55 @@ async def configure_environment_provider(
     :param environment: Environment to configure.
     :type environment: :obj:`etos_api.routers.etos.schemas.ConfigureEnvironmentProviderRequest`
     """
-    LOGGER.identifier.set(environment.suite_id)
-    LOGGER.info("Configuring environment provider using %r", environment)
-    etos_library = ETOS("ETOS API", os.getenv("HOSTNAME"), "ETOS API")
+    await configure_environment(environment.dict())
 
-    end_time = time.time() + etos_library.debug.default_http_timeout
-    LOGGER.debug("HTTP Timeout: %r", etos_library.debug.default_http_timeout)
-    async with aiohttp.ClientSession() as session:
-        while time.time() < end_time:
-            try:
-                async with session.post(
-                    f"{etos_library.debug.environment_provider}/configure",
-                    json=environment.dict(),
-                    headers={
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                    },
-                ) as response:
-                    assert 200 <= response.status < 400
-                break
-            except AssertionError:
-                LOGGER.warning(
-                    "Configuration request failed: %r, %r",
-                    response.status,
-                    response.reason,
+
+async def configure_environment(environment: ConfigureEnvironmentProviderDict):
+    """Configure the environment provider and wait for the configuration to apply.
+
+    :param environment: Environment to configure.
+    :type environment: :obj:`.schemas.ConfigureEnvironmentProviderDict`
+    """
+    LOGGER.identifier.set(environment["suite_id"])
+    LOGGER.debug("Configuring environment provider using %r", environment)
+    loop = asyncio.get_running_loop()
+    end_time = loop.time() + ETOS_LIBRARY.debug.default_http_timeout
+    LOGGER.debug("HTTP Timeout: %r", ETOS_LIBRARY.debug.default_http_timeout)
+    # Serialize the request body once, it is the same for every attempt.
+    body = orjson.dumps(environment)
+    session = http_session()
+    attempt = 0
+    while loop.time() < end_time:
+        try:
+            async with session.post(
+                f"{ETOS_LIBRARY.debug.environment_provider}/configure",
+                data=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+            ) as response:
+                assert 200 <= response.status < 400
+            break
+        except AssertionError:
+            LOGGER.warning(
+                "Configuration request failed: %r, %r",
+                response.status,
+                response.reason,
+            )
+            # Never sleep past the deadline, whatever Retry-After says.
+            await asyncio.sleep(
+                min(
+                    retry_delay(
+                        attempt, retry_after=response.headers.get("Retry-After")
+                    ),
+                    max(0.0, end_time - loop.time()),
                 )
-                await asyncio.sleep(2)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unable to configure environment provider with '{environment.json()}'",
             )
-        await _wait_for_configuration(etos_library, environment)
+            attempt += 1
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unable to configure environment provider with '{body.decode()}'",
+        )
+    await _wait_for_configuration(ETOS_LIBRARY, environment)
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Schemas for the environment provider endpoint."""
+from typing import TypedDict
 from pydantic import BaseModel
 
 
@@ -25,3 +26,19 @@ class ConfigureEnvironmentProviderRequest(BaseModel):
     execution_space_provider: str
     iut_provider: str
     log_area_provider: str
+
+
+# Pylint does not understand that TypedDict can be inherited.
+# pylint: disable=inherit-non-class,too-few-public-methods
+class ConfigureEnvironmentProviderDict(TypedDict):
+    """Environment provider configuration, as passed around inside the ETOS API.
+
+    Has the same keys as :obj:`ConfigureEnvironmentProviderRequest`, but is
+    not validated again since it never comes from outside of the API.
+    """
+
+    suite_id: str
+    dataset: dict
+    execution_space_provider: str
+    iut_provider: str
+    log_area_provider: str
@@ -14,20 +14,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """ETOS API router."""
+import asyncio
 import logging
+import threading
 from uuid import uuid4
-import os
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from starlette.responses import Response
-from etos_lib import ETOS
+from etos_lib.lib.exceptions import PublisherConfigurationMissing
 from etos_lib.logging.logger import FORMAT_CONFIG
 from eiffellib.events import EiffelTestExecutionRecipeCollectionCreatedEvent
+from eiffellib.publishers import RabbitMQPublisher
 
+from etos_api.library.clients import ETOS_LIBRARY
+from etos_api.library.graphql import GraphqlQueryHandler
 from etos_api.library.validator import SuiteValidator
-from etos_api.library.utilities import sync_to_async, aclosing
-from etos_api.routers.environment_provider.router import configure_environment_provider
+from etos_api.library.utilities import sync_to_async
+from etos_api.routers.environment_provider.router import configure_environment
 from etos_api.routers.environment_provider.schemas import (
-    ConfigureEnvironmentProviderRequest,
+    ConfigureEnvironmentProviderDict,
 )
 from .schemas import StartEtosRequest, StartEtosResponse
 from .utilities import wait_for_artifact_created
@@ -35,6 +40,114 @@ from .utilities import wait_for_artifact_created
 ROUTER = APIRouter()
 LOGGER = logging.getLogger(__name__)
 logging.getLogger("pika").setLevel(logging.WARNING)
+GRAPHQL_QUERY_HANDLER = GraphqlQueryHandler(ETOS_LIBRARY)
+PUBLISHER_START_TIMEOUT = 10
+PUBLISH_LOCK = threading.Lock()
+# The publisher configuration only depends on environment variables, so it is
+# loaded once, when the router is imported.
+ETOS_LIBRARY.config.rabbitmq_publisher_from_environment()
+
+
+def publisher_ready():
+    """Check whether TERCC events can be published without blocking.
+
+    The 'running' flag of the publisher is only set once, when it first
+    connects, so the channel is checked as well. It is closed and replaced
+    while the publisher reconnects to RabbitMQ.
+
+    :return: Whether the event publisher is connected, or sending is disabled.
+    :rtype: bool
+    """
+    if ETOS_LIBRARY.debug.disable_sending_events:
+        return True
+    publisher = ETOS_LIBRARY.publisher
+    if publisher is None or not publisher.is_alive():
+        return False
+    # pylint:disable=protected-access
+    return publisher._channel is not None and publisher._channel.is_open
+
+
+def send_event(event, links, data):
+    """Send an event with the shared publisher, one event at a time.
+
+    The publisher, and its pika channel, are shared by all requests but are
+    not thread-safe, so events must not be sent from several threads at once.
+
+    :param event: Initialized event to send.
+    :type event: :obj:`eiffellib.events.eiffel_base_event.EiffelBaseEvent`
+    :param links: Links to add to the event.
+    :type links: dict
+    :param data: Data to add to the event.
+    :type data: dict
+    :return: The event that was sent.
+    :rtype: :obj:`eiffellib.events.eiffel_base_event.EiffelBaseEvent`
+    """
+    with PUBLISH_LOCK:
+        return ETOS_LIBRARY.events.send(event, links, data)
+
+
+@ROUTER.on_event("startup")
+async def start_event_publisher():
+    """Start the event publisher before the first request is handled.
+
+    This is 'ETOS.start_publisher' without the wait for the connection, so that
+    a missing or broken configuration fails the startup, while RabbitMQ being
+    down does not. The connection is only waited for a while, after that the
+    API starts anyway and the publisher keeps connecting in the background.
+
+    :raises PublisherConfigurationMissing: If there is no publisher configuration.
+    """
+    LOGGER.info("Start event publisher.")
+    rabbitmq = ETOS_LIBRARY.config.get("rabbitmq_publisher")
+    if not rabbitmq:
+        raise PublisherConfigurationMissing
+    ETOS_LIBRARY.publisher = RabbitMQPublisher(routing_key=None, **rabbitmq)
+    ETOS_LIBRARY.config.set("publisher", ETOS_LIBRARY.publisher)
+    if not ETOS_LIBRARY.debug.disable_sending_events:
+        # Connects, and keeps reconnecting, in a daemon thread.
+        ETOS_LIBRARY.publisher.start(wait=False)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PUBLISHER_START_TIMEOUT
+    while not publisher_ready():
+        if loop.time() >= deadline:
+            LOGGER.error("Event publisher is not connected yet, continuing startup.")
+            return
+        await asyncio.sleep(0.1)
+    LOGGER.info("Event published started successfully.")
+
+
+@ROUTER.on_event("shutdown")
+async def stop_event_publisher():
+    """Stop the event publisher, which is kept open for the lifetime of the API.
+
+    A publisher that is not connected is left to its daemon thread.
+    """
+    if ETOS_LIBRARY.debug.disable_sending_events or not publisher_ready():
+        return
+    LOGGER.info("Stop event publisher.")
+    await sync_to_async(ETOS_LIBRARY.publisher.stop)
+    ETOS_LIBRARY.publisher = None
+    LOGGER.info("Event publisher stopped.")
+
+
+@ROUTER.on_event("shutdown")
+async def close_graphql_session():
+    """Close the GraphQL session that is shared by all requests."""
+    await GRAPHQL_QUERY_HANDLER.close()
+
+
+def _discard(task):
+    """Cancel a task whose result is not needed.
+
+    A task that has already failed cannot be cancelled. Its exception is
+    retrieved explicitly, so that asyncio never logs it as not retrieved,
+    instead of relying on 'cancel' doing that for done tasks.
+
+    :param task: Task to discard.
+    :type task: :obj:`asyncio.Task`
+    """
+    if not task.cancel() and not task.cancelled():
+        task.exception()
 
 
 @ROUTER.post("/etos", tags=["etos"], response_model=StartEtosResponse)
@@ -43,31 +156,44 @@ async def start_etos(etos: StartEtosRequest):
 
     :param etos: ETOS pydantic model.
     :type etos: :obj:`etos_api.routers.etos.schemas.StartEtosRequest`
-    :return: JSON dictionary with response.
-    :rtype: dict
+    :return: JSON response, as described by StartEtosResponse.
+    :rtype: :obj:`fastapi.responses.ORJSONResponse`
     """
+    # Fail fast instead of doing all the work and then blocking on a
+    # publisher that is not connected to RabbitMQ.
+    if not publisher_ready():
+        raise HTTPException(
+            status_code=503, detail="Not connected to the event message bus."
+        )
     tercc = EiffelTestExecutionRecipeCollectionCreatedEvent()
     LOGGER.identifier.set(tercc.meta.event_id)
 
-    LOGGER.info("Validating test suite.")
+    LOGGER.info(
+        "Get artifact created %r", (etos.artifact_identity or str(etos.artifact_id))
+    )
+    # The artifact lookup does not depend on the test suite, so let it run
+    # while the suite is being downloaded and validated.
+    artifact_task = asyncio.create_task(
+        wait_for_artifact_created(
+            GRAPHQL_QUERY_HANDLER, etos.artifact_identity, etos.artifact_id
+        )
+    )
+
+    LOGGER.debug("Validating test suite.")
     try:
         await SuiteValidator().validate(etos.test_suite_url)
     except AssertionError as exception:
+        _discard(artifact_task)
         LOGGER.error("Test suite validation failed!")
         LOGGER.error(exception)
         return Response(status_code=400)
-    LOGGER.info("Test suite validated.")
-
-    etos_library = ETOS("ETOS API", os.getenv("HOSTNAME"), "ETOS API")
-    await sync_to_async(etos_library.config.rabbitmq_publisher_from_environment)
+    except BaseException:
+        _discard(artifact_task)
+        raise
+    LOGGER.debug("Test suite validated.")
 
-    LOGGER.info(
-        "Get artifact created %r", (etos.artifact_identity or str(etos.artifact_id))
-    )
     try:
-        artifact = await wait_for_artifact_created(
-            etos_library, etos.artifact_identity, etos.artifact_id
-        )
+        artifact = await artifact_task
     except Exception as exception:  # pylint:disable=broad-except
         LOGGER.critical(exception)
         raise HTTPException(
@@ -78,7 +204,7 @@ async def start_etos(etos: StartEtosRequest):
             status_code=400,
             detail=f"Unable to find artifact with identity '{etos.artifact_identity or str(etos.artifact_id)}'",
         )
-    LOGGER.info("Found artifact created %r", artifact)
+    LOGGER.debug("Found artifact created %r", artifact)
     # There are assumptions here. Since "edges" list is already tested
     # and we know that the return from GraphQL must be 'node'.'meta'.'id'
     # if there are "edges", this is fine.
@@ -91,7 +217,7 @@ async def start_etos(etos: StartEtosRequest):
         "selectionStrategy": {"tracker": "Suite Builder", "id": str(uuid4())},
         "batchesUri": etos.test_suite_url,
     }
-    request = ConfigureEnvironmentProviderRequest(
+    environment = ConfigureEnvironmentProviderDict(
         suite_id=tercc.meta.event_id,
         dataset=etos.dataset,
         execution_space_provider=etos.execution_space_provider,
@@ -99,27 +225,30 @@ async def start_etos(etos: StartEtosRequest):
         log_area_provider=etos.log_area_provider,
     )
     try:
-        await configure_environment_provider(request)
+        await configure_environment(environment)
     except Exception as exception:  # pylint:disable=broad-except
         LOGGER.critical(exception)
         raise HTTPException(
             status_code=400,
             detail=f"Could not configure environment provider. {exception}",
         ) from exception
-    LOGGER.info("Environment provider configured.")
+    LOGGER.debug("Environment provider configured.")
 
-    LOGGER.info("Start event publisher.")
-    await sync_to_async(etos_library.start_publisher)
-    LOGGER.info("Event published started successfully.")
-    LOGGER.info("Publish TERCC event.")
-    async with aclosing(etos_library.publisher):
-        event = etos_library.events.send(tercc, links, data)
-    LOGGER.info("Event published.")
+    LOGGER.debug("Publish TERCC event.")
+    # Sending blocks until the publisher channel is open, which may take a
+    # while if the connection to RabbitMQ was lost during the request.
+    event = await sync_to_async(send_event, tercc, links, data)
+    LOGGER.debug("Event published.")
 
     LOGGER.info("ETOS triggered successfully.")
-    return {
-        "tercc": event.meta.event_id,
-        "artifact_id": artifact_id,
-        "artifact_identity": identity,
-        "event_repository": etos_library.debug.graphql_server,
-    }
+    # The response is built from values that are already known to be valid,
+    # so it is returned directly instead of being validated by the response
+    # model, which is kept for the API documentation.
+    return ORJSONResponse(
+        {
+            "tercc": event.meta.event_id,
+            "artifact_id": artifact_id,
+            "artifact_identity": identity,
+            "event_repository": ETOS_LIBRARY.debug.graphql_server,
+        }
+    )
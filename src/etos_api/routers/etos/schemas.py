@@ -48,14 +48,15 @@ class StartEtosRequest(BaseModel):
         :return: The value of artifact_id.
         :rtype: str or None
         """
-        if values.get("artifact_identity") is None and not artifact_id:
+        has_identity = values.get("artifact_identity") is not None
+        if has_identity == bool(artifact_id):
+            if has_identity:
+                raise ValueError(
+                    "Only one of 'artifact_identity' or 'artifact_id' is required."
+                )
             raise ValueError(
                 "At least one of 'artifact_identity' or 'artifact_id' is required."
             )
-        if values.get("artifact_identity") is not None and artifact_id:
-            raise ValueError(
-                "Only one of 'artifact_identity' or 'artifact_id' is required."
-            )
         return artifact_id
 
 
@@ -16,23 +16,150 @@
 """Utilities specific for the ETOS endpoint."""
 import logging
 import asyncio
-import time
-from etos_api.library.graphql import GraphqlQueryHandler
+from collections import Counter, OrderedDict
+from functools import partial
+from etos_api.library.utilities import retry_delay
 from etos_api.library.graphql_queries import (
-    ARTIFACT_IDENTITY_QUERY,
-    VERIFY_ARTIFACT_ID_EXISTS,
+    ARTIFACT_CREATED_QUERY,
+    ARTIFACT_IDENTITY_SEARCH,
+    ARTIFACT_ID_SEARCH,
 )
 
 LOGGER = logging.getLogger(__name__)
+ARTIFACT_CACHE_TTL = 30
+ARTIFACT_CACHE_SIZE = 1024
+# Lookups of artifacts, keyed by (artifact_identity, artifact_id), mapped to
+# the time when the lookup expires and the task doing the lookup.
+_ARTIFACT_CACHE = OrderedDict()
+# Number of requests that are waiting for each lookup task.
+_ARTIFACT_WAITERS = Counter()
+
+
+def _artifact_lookup_done(key, task):
+    """Start the time to live of a found artifact, or forget a failed lookup.
+
+    :param key: Key of the lookup in the artifact cache.
+    :type key: tuple
+    :param task: The finished lookup.
+    :type task: :obj:`asyncio.Task`
+    """
+    if _ARTIFACT_CACHE.get(key, (None, None))[1] is not task:
+        return
+    if task.cancelled() or task.exception() is not None or task.result() is None:
+        del _ARTIFACT_CACHE[key]
+    else:
+        _ARTIFACT_CACHE[key] = (task.get_loop().time() + ARTIFACT_CACHE_TTL, task)
+
+
+def _reusable_lookup(key, now):
+    """Get the lookup of an artifact that a request can wait for, if there is one.
+
+    A lookup can be waited for if it is still running, or if it found the
+    artifact less than ARTIFACT_CACHE_TTL seconds ago. A lookup that has
+    finished without finding the artifact is never reused, even before its
+    done callback has removed it from the cache.
+
+    :param key: Key of the lookup in the artifact cache.
+    :type key: tuple
+    :param now: Current event loop time.
+    :type now: float
+    :return: The lookup task, or None.
+    :rtype: :obj:`asyncio.Task` or None
+    """
+    expires, task = _ARTIFACT_CACHE.get(key, (0, None))
+    if task is None:
+        return None
+    if not task.done():
+        return task
+    if task.cancelled() or task.exception() is not None or task.result() is None:
+        return None
+    return task if expires >= now else None
+
+
+async def _wait_for_lookup(key, task):
+    """Wait for an artifact lookup that may be shared with other requests.
+
+    The lookup is shielded, so that a cancelled request does not cancel the
+    lookup for the other requests that are waiting for it. The lookup is
+    cancelled when the last request that is waiting for it is cancelled.
+
+    :param key: Key of the lookup in the artifact cache.
+    :type key: tuple
+    :param task: The lookup to wait for.
+    :type task: :obj:`asyncio.Task`
+    :return: ArtifactCreated edges from GraphQL.
+    :rtype: list
+    """
+    _ARTIFACT_WAITERS[task] += 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        _ARTIFACT_WAITERS[task] -= 1
+        if not _ARTIFACT_WAITERS[task]:
+            del _ARTIFACT_WAITERS[task]
+            if not task.done():
+                # Nobody is waiting for the lookup anymore. Forget it right
+                # away, so that new requests do not join a cancelled lookup.
+                if _ARTIFACT_CACHE.get(key, (None, None))[1] is task:
+                    del _ARTIFACT_CACHE[key]
+                task.cancel()
 
 
 async def wait_for_artifact_created(
-    etos_library, artifact_identity, artifact_id, timeout=30
+    query_handler, artifact_identity, artifact_id, timeout=30
+):
+    """Wait for an artifact created, sharing the lookup with other requests.
+
+    Concurrent requests for the same artifact wait for the same lookup, and
+    a found artifact is reused for ARTIFACT_CACHE_TTL seconds. Lookups that
+    did not find the artifact are not reused. If a shared lookup gives up
+    before this request's own timeout, a new lookup is started for the
+    remaining time.
+
+    :param query_handler: GraphQL query handler to execute the query with.
+    :type query_handler: :obj:`etos_api.library.graphql.GraphqlQueryHandler`
+    :param artifact_identity: Identity of the artifact to get.
+    :type artifact_identity: str
+    :param artifact_id: ID of the artifact to get.
+    :type artifact_id: UUID
+    :param timeout: Maximum time to wait for a response (seconds).
+    :type timeout: int
+    :return: ArtifactCreated edges from GraphQL.
+    :rtype: list
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    key = (artifact_identity, artifact_id)
+    while True:
+        task = _reusable_lookup(key, loop.time())
+        if task is None:
+            task = loop.create_task(
+                _poll_artifact_created(
+                    query_handler,
+                    artifact_identity,
+                    artifact_id,
+                    max(0.0, deadline - loop.time()),
+                )
+            )
+            # The time to live starts when the artifact is found.
+            _ARTIFACT_CACHE[key] = (float("inf"), task)
+            task.add_done_callback(partial(_artifact_lookup_done, key))
+            while len(_ARTIFACT_CACHE) > ARTIFACT_CACHE_SIZE:
+                _ARTIFACT_CACHE.popitem(last=False)
+        else:
+            _ARTIFACT_CACHE.move_to_end(key)
+        artifact = await _wait_for_lookup(key, task)
+        if artifact is not None or loop.time() >= deadline:
+            return artifact
+
+
+async def _poll_artifact_created(
+    query_handler, artifact_identity, artifact_id, timeout
 ):
     """Execute graphql query and wait for an artifact created.
 
-    :param etos_library: ETOS library instande.
-    :type etos_library: :obj:`etos_lib.etos.ETOS`
+    :param query_handler: GraphQL query handler to execute the query with.
+    :type query_handler: :obj:`etos_api.library.graphql.GraphqlQueryHandler`
     :param artifact_identity: Identity of the artifact to get.
     :type artifact_identity: str
     :param artifact_id: ID of the artifact to get.
@@ -42,27 +169,51 @@ async def wait_for_artifact_created(
     :return: ArtifactCreated edges from GraphQL.
     :rtype: list
     """
-    timeout = time.time() + timeout
-    query_handler = GraphqlQueryHandler(etos_library)
     if artifact_id is not None:
-        LOGGER.info("Verify that artifact ID %r exists.", artifact_id)
-        query = VERIFY_ARTIFACT_ID_EXISTS
+        LOGGER.debug("Verify that artifact ID %r exists.", artifact_id)
+        search = ARTIFACT_ID_SEARCH
     elif artifact_identity is not None:
-        LOGGER.info("Getting artifact from packageURL %r", artifact_identity)
-        query = ARTIFACT_IDENTITY_QUERY
+        LOGGER.debug("Getting artifact from packageURL %r", artifact_identity)
+        search = ARTIFACT_IDENTITY_SEARCH
     else:
         raise ValueError("'artifact_id' and 'artifact_identity' are both None!")
     artifact_identifier = artifact_identity or str(artifact_id)
 
     LOGGER.debug("Wait for artifact created event.")
-    while time.time() < timeout:
-        try:
-            artifacts = await query_handler.execute(query % artifact_identifier)
-            assert artifacts is not None
-            assert artifacts["artifactCreated"]["edges"]
-            return artifacts["artifactCreated"]["edges"]
-        except (AssertionError, KeyError):
-            LOGGER.warning("Artifact created not ready yet")
-        await asyncio.sleep(2)
-    LOGGER.error("Artifact %r not found.", artifact_identifier)
-    return None
+    try:
+        return await asyncio.wait_for(
+            _poll_until_found(
+                query_handler,
+                {"search": search % artifact_identifier},
+                artifact_identifier,
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        LOGGER.error("Artifact %r not found.", artifact_identifier)
+        return None
+
+
+async def _poll_until_found(query_handler, variables, artifact_identifier):
+    """Query for an artifact created until it is found.
+
+    :param query_handler: GraphQL query handler to execute the query with.
+    :type query_handler: :obj:`etos_api.library.graphql.GraphqlQueryHandler`
+    :param variables: Variables for the artifact created query.
+    :type variables: dict
+    :param artifact_identifier: Identity or ID of the artifact, for logging.
+    :type artifact_identifier: str
+    :return: ArtifactCreated edges from GraphQL.
+    :rtype: list
+    """
+    # Poll often at first, when the artifact is likely to show up soon, and
+    # back off to polling every other second.
+    attempt = 0
+    while True:
+        artifacts = await query_handler.execute(ARTIFACT_CREATED_QUERY, variables)
+        edges = ((artifacts or {}).get("artifactCreated") or {}).get("edges")
+        if edges:
+            return edges
+        LOGGER.debug("Artifact %r not ready yet.", artifact_identifier)
+        await asyncio.sleep(retry_delay(attempt, base=0.1, cap=2.0, jitter=0.05))
+        attempt += 1
@@ -15,25 +15,30 @@
 # limitations under the License.
 """ETOS API selftest router."""
 import logging
+from starlette.requests import Request
 from starlette.responses import Response
 from fastapi import APIRouter
 
 ROUTER = APIRouter()
 LOGGER = logging.getLogger(__name__)
+# The ping response has no body and no per-request headers, so the same
+# response is sent to every ping instead of building a new one each time.
+PING_RESPONSE = Response(status_code=204)
 
 
-@ROUTER.get("/selftest/ping", tags=["maintenance"], status_code=204)
-async def ping():
+@ROUTER.api_route(
+    "/selftest/ping", methods=["GET", "HEAD"], tags=["maintenance"], status_code=204
+)
+async def ping(request: Request):
     """Ping the ETOS service in order to check if it is up and running.
 
+    HEAD requests exist solely for backwards compatibility. DEPRECATED.
+
+    :param request: The ping request.
+    :type request: :obj:`starlette.requests.Request`
     :return: HTTP 204 response.
     :rtype: :obj:`starlette.responses.Response`
     """
-    return Response(status_code=204)
-
-
-@ROUTER.head("/selftest/ping", tags=["maintenance"], status_code=204)
-async def head_ping():
-    """Exists solely for backwards compatibility. DEPRECATED."""
-    LOGGER.warning("DEPRECATED HEAD request to ping received!")
-    return Response(status_code=204)
+    if request.method == "HEAD":
+        LOGGER.warning("DEPRECATED HEAD request to ping received!")
+    return PING_RESPONSE
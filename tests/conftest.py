@@ -1,8 +1,145 @@
-# -*- coding: utf-8 -*-
-"""
-Dummy conftest.py for etos_api.
-
-If you don't know what this is for, just leave it empty.
-Read more about conftest.py under:
-https://pytest.org/latest/plugins.html
-"""
+# Copyright 2021 Axis Communications AB.
+#
+# For a full list of individual contributors, please see the commit history.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Shared fixtures for the ETOS API tests."""
+import asyncio
+from collections import OrderedDict
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+import uvloop
+from fastapi.testclient import TestClient
+from etos_lib.lib.debug import Debug
+from etos_api.main import APP
+from etos_api.library.validator import SuiteValidator
+from etos_api.library.graphql import GraphqlQueryHandler
+
+
+# Use uvloop, like uvicorn does when it is installed.
+asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+@pytest.fixture(name="download_suite_mock")
+def fixture_download_suite_mock(monkeypatch):
+    """Replace the test suite download in the suite validator.
+
+    Suites validated by earlier tests are not remembered.
+
+    :return: Mock that is awaited instead of SuiteValidator._download_suite.
+    :rtype: :obj:`unittest.mock.AsyncMock`
+    """
+    download_suite_mock = AsyncMock()
+    monkeypatch.setattr(SuiteValidator, "_download_suite", download_suite_mock)
+    monkeypatch.setattr("etos_api.library.validator._VALIDATED_SUITES", OrderedDict())
+    return download_suite_mock
+
+
+@pytest.fixture(name="graphql_execute_mock")
+def fixture_graphql_execute_mock(monkeypatch):
+    """Replace the execution of GraphQL queries.
+
+    The GraphQL session is never opened, so no transport is created.
+    All queries respond with an artifact created for 'pkg:testing/etos'.
+    Artifacts found by earlier tests are not reused.
+
+    :return: Mock that is awaited instead of GraphqlQueryHandler.execute.
+    :rtype: :obj:`unittest.mock.AsyncMock`
+    """
+    graphql_execute_mock = AsyncMock(
+        return_value={
+            "artifactCreated": {
+                "edges": [
+                    {
+                        "node": {
+                            "meta": {"id": "cda58701-5614-49bf-9101-11b71a5721fb"},
+                            "data": {"identity": "pkg:testing/etos"},
+                        }
+                    }
+                ]
+            }
+        }
+    )
+    monkeypatch.setattr(GraphqlQueryHandler, "connect", AsyncMock())
+    monkeypatch.setattr(GraphqlQueryHandler, "close", AsyncMock())
+    monkeypatch.setattr(GraphqlQueryHandler, "execute", graphql_execute_mock)
+    monkeypatch.setattr(
+        "etos_api.routers.etos.utilities._ARTIFACT_CACHE", OrderedDict()
+    )
+    return graphql_execute_mock
+
+
+@pytest.fixture(name="client_session_mock")
+def fixture_client_session_mock(monkeypatch):
+    """Replace the shared aiohttp client session used by the environment provider.
+
+    All requests on the session respond with status 200 and a complete
+    environment provider configuration.
+
+    :return: Mock of the aiohttp client session.
+    :rtype: :obj:`unittest.mock.MagicMock`
+    """
+    response = MagicMock(status=200)
+    response.json = AsyncMock(
+        return_value={
+            "dataset": {},
+            "iut_provider": "default",
+            "execution_space_provider": "default",
+            "log_area_provider": "default",
+        }
+    )
+    client_session_mock = MagicMock()
+    client_session_mock.post.return_value.__aenter__.return_value = response
+    client_session_mock.get.return_value.__aenter__.return_value = response
+    monkeypatch.setattr(
+        "etos_api.routers.environment_provider.router.http_session",
+        MagicMock(return_value=client_session_mock),
+    )
+    return client_session_mock
+
+
+@pytest.fixture(scope="session", name="event_loop")
+def fixture_event_loop():
+    """Event loop shared by all asyncio tests in the test session.
+
+    Overrides the function scoped loop that pytest-asyncio creates per test.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session", name="client")
+def fixture_client(event_loop):
+    """Test client for the ETOS API, shared by all tests in the test session.
+
+    The client is entered so that the startup and shutdown events of the
+    application are run once, around the whole test session. It runs on the
+    session event loop, which it shares with the asyncio tests.
+    """
+    asyncio.set_event_loop(event_loop)
+    with TestClient(APP) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True, name="debug")
+def fixture_debug():
+    """ETOS library debug, with the recorded events cleared after each test.
+
+    :return: ETOS library debug instance.
+    :rtype: :obj:`etos_lib.lib.debug.Debug`
+    """
+    debug = Debug()
+    yield debug
+    debug.events_received.clear()
+    debug.events_published.clear()
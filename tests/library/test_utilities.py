@@ -0,0 +1,105 @@
+# Copyright 2021 Axis Communications AB.
+#
+# For a full list of individual contributors, please see the commit history.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for the utilities library."""
+import logging
+from etos_api.library.utilities import retry_delay
+
+
+class TestUtilities:
+    """Test the utilities library."""
+
+    logger = logging.getLogger(__name__)
+
+    def test_retry_delay_backoff(self):
+        """Test that the retry delay grows exponentially up to the cap.
+
+        Approval criteria:
+            - The retry delay shall double for each attempt, plus jitter.
+            - The retry delay shall not grow beyond the cap, plus jitter.
+
+        Test steps::
+            1. Get the retry delay for a number of attempts.
+            2. Verify that the delays are within the expected ranges.
+        """
+        self.logger.info("STEP: Get the retry delay for a number of attempts.")
+        delays = [retry_delay(attempt, base=0.25, cap=4.0) for attempt in range(8)]
+        self.logger.info("STEP: Verify that the delays are within the expected ranges.")
+        for delay, expected in zip(delays, (0.25, 0.5, 1.0, 2.0, 4.0, 4.0, 4.0, 4.0)):
+            assert expected <= delay <= expected + 0.25
+
+    def test_retry_delay_retry_after(self):
+        """Test that a Retry-After header in seconds takes precedence.
+
+        Approval criteria:
+            - The retry delay shall be the Retry-After value, if it is in seconds.
+            - The retry delay shall fall back to the backoff for HTTP-dates.
+            - The retry delay shall never be shorter than the backoff.
+
+        Test steps::
+            1. Get the retry delay with a Retry-After value in seconds.
+            2. Verify that the delay is the Retry-After value.
+            3. Get the retry delay with a Retry-After HTTP-date.
+            4. Verify that the delay is the backoff delay.
+            5. Get the retry delay with a Retry-After value of zero and below zero.
+            6. Verify that the delay is the backoff delay.
+        """
+        self.logger.info(
+            "STEP: Get the retry delay with a Retry-After value in seconds."
+        )
+        delay = retry_delay(0, retry_after="10")
+        self.logger.info("STEP: Verify that the delay is the Retry-After value.")
+        assert delay == 10.0
+        self.logger.info("STEP: Get the retry delay with a Retry-After HTTP-date.")
+        delay = retry_delay(0, base=0.25, retry_after="Wed, 21 Oct 2015 07:28:00 GMT")
+        self.logger.info("STEP: Verify that the delay is the backoff delay.")
+        assert 0.25 <= delay <= 0.5
+        self.logger.info(
+            "STEP: Get the retry delay with a Retry-After value of zero and below zero."
+        )
+        delays = [
+            retry_delay(2, base=0.25, retry_after="0"),
+            retry_delay(2, base=0.25, retry_after="-5"),
+        ]
+        self.logger.info("STEP: Verify that the delay is the backoff delay.")
+        assert delays == [1.0, 1.0]
+
+    def test_retry_delay_retry_after_not_finite(self):
+        """Test that a Retry-After header that is not a finite number is ignored.
+
+        Approval criteria:
+            - The retry delay shall fall back to the backoff for 'inf' and 'nan'.
+            - The retry delay shall be the Retry-After value, however large.
+
+        Test steps::
+            1. Get the retry delay with Retry-After values that are not finite.
+            2. Verify that the delays are the backoff delay.
+            3. Get the retry delay with a large Retry-After value.
+            4. Verify that the delay is the Retry-After value.
+        """
+        self.logger.info(
+            "STEP: Get the retry delay with Retry-After values that are not finite."
+        )
+        delays = [
+            retry_delay(0, base=0.25, retry_after=value)
+            for value in ("inf", "-inf", "nan")
+        ]
+        self.logger.info("STEP: Verify that the delays are the backoff delay.")
+        for delay in delays:
+            assert 0.25 <= delay <= 0.5
+        self.logger.info("STEP: Get the retry delay with a large Retry-After value.")
+        delay = retry_delay(0, retry_after="3600")
+        self.logger.info("STEP: Verify that the delay is the Retry-After value.")
+        assert delay == 3600.0
@@ -15,12 +15,81 @@
 # limitations under the License.
 """Tests for the validator library."""
 import logging
-import sys
-from unittest.mock import patch
+from unittest.mock import MagicMock
 import pytest
-from etos_api.library.validator import SuiteValidator, ValidationError
-
-logging.basicConfig(level=logging.DEBUG, stream=sys.stdout)
+from etos_api.library.validator import Suite, SuiteValidator, ValidationError
+
+VALID_CONSTRAINTS = [
+    {"key": "ENVIRONMENT", "value": {}},
+    {"key": "PARAMETERS", "value": {}},
+    {"key": "COMMAND", "value": "exit 0"},
+    {"key": "TEST_RUNNER", "value": "TestRunner"},
+    {"key": "EXECUTE", "value": []},
+    {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
+]
+
+VALID_RECIPE = {
+    "constraints": VALID_CONSTRAINTS,
+    "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7885",
+    "testCase": {
+        "id": "test_validator",
+        "tracker": "Github",
+        "url": "https://github.com/eiffel-community/etos-api",
+    },
+}
+
+VALID_SUITE = {"name": "TestValidator", "priority": 1, "recipes": [VALID_RECIPE]}
+
+# Constraint key and the value it is given to make the suite invalid.
+WRONG_TYPE_CONSTRAINTS = [
+    ("ENVIRONMENT", "Wrong"),
+    ("PARAMETERS", "Wrong"),
+    ("COMMAND", {"wrong": True}),
+    ("TEST_RUNNER", {"wrong": True}),
+    ("EXECUTE", "Wrong"),
+    ("CHECKOUT", "Wrong"),
+]
+
+EMPTY_CONSTRAINTS = [
+    ("COMMAND", ""),
+    ("TEST_RUNNER", ""),
+    ("CHECKOUT", []),
+]
+
+
+@pytest.fixture(scope="module", name="validator")
+def fixture_validator():
+    """Suite validator shared by all tests in this module."""
+    return SuiteValidator()
+
+
+def suite_with_constraints(constraints):
+    """Create a test suite from the valid suite with other recipe constraints.
+
+    The valid suite is never modified, only the changed parts are new objects.
+
+    :param constraints: Constraints to use in the test suite recipe.
+    :type constraints: list
+    :return: Test suite as returned by the test suite download.
+    :rtype: list
+    """
+    return [{**VALID_SUITE, "recipes": [{**VALID_RECIPE, "constraints": constraints}]}]
+
+
+def constraints_with_value(key, value):
+    """Copy the valid constraints with the value of a single constraint replaced.
+
+    :param key: Key of the constraint to change.
+    :type key: str
+    :param value: New value for the constraint.
+    :type value: any
+    :return: Constraints where only the changed constraint is a new object.
+    :rtype: list
+    """
+    return [
+        {**constraint, "value": value} if constraint["key"] == key else constraint
+        for constraint in VALID_CONSTRAINTS
+    ]
 
 
 class TestValidator:
@@ -30,8 +99,7 @@ class TestValidator:
     # Mark all test methods as asyncio methods to tell pytest to 'await' them.
     pytestmark = pytest.mark.asyncio
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    async def test_validate_proper_suite(self, download_suite_mock):
+    async def test_validate_proper_suite(self, download_suite_mock, validator):
         """Test that the validator validates a proper suite correctly.
 
         Approval criteria:
@@ -41,42 +109,41 @@ class TestValidator:
             1. Validate a proper suite.
             2. Verify that no exceptions were raised.
         """
-        download_suite_mock.return_value = [
-            {
-                "name": "TestValidator",
-                "priority": 1,
-                "recipes": [
-                    {
-                        "constraints": [
-                            {"key": "ENVIRONMENT", "value": {}},
-                            {"key": "PARAMETERS", "value": {}},
-                            {"key": "COMMAND", "value": "exit 0"},
-                            {"key": "TEST_RUNNER", "value": "TestRunner"},
-                            {"key": "EXECUTE", "value": []},
-                            {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-                        ],
-                        "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7885",
-                        "testCase": {
-                            "id": "test_validate_proper_suite",
-                            "tracker": "Github",
-                            "url": "https://github.com/eiffel-community/etos-api",
-                        },
-                    }
-                ],
-            }
-        ]
+        download_suite_mock.return_value = [VALID_SUITE]
         self.logger.info("STEP: Validate a proper suite.")
-        validator = SuiteValidator()
-        try:
-            await validator.validate("url")
-            exception = False
-        except (AssertionError, ValidationError):
-            exception = True
+        await validator.validate("url")
         self.logger.info("STEP: Verify that no exceptions were raised.")
-        assert exception is False
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    async def test_validate_missing_constraints(self, download_suite_mock):
+    async def test_validate_proper_suite_again(
+        self, download_suite_mock, validator, monkeypatch
+    ):
+        """Test that a suite that has passed validation is not validated again.
+
+        Approval criteria:
+            - Suite validator shall validate a suite that it has not seen before.
+            - Suite validator shall approve a suite that it has approved before,
+              without validating it again.
+
+        Test steps::
+            1. Validate a proper suite.
+            2. Verify that the suite was validated.
+            3. Validate the same suite again.
+            4. Verify that the suite was not validated again.
+        """
+        download_suite_mock.return_value = [VALID_SUITE]
+        suite_mock = MagicMock(wraps=Suite)
+        monkeypatch.setattr("etos_api.library.validator.Suite", suite_mock)
+        self.logger.info("STEP: Validate a proper suite.")
+        await validator.validate("url")
+        self.logger.info("STEP: Verify that the suite was validated.")
+        suite_mock.assert_called_once_with(**VALID_SUITE)
+        self.logger.info("STEP: Validate the same suite again.")
+        suite_mock.reset_mock()
+        await validator.validate("url")
+        self.logger.info("STEP: Verify that the suite was not validated again.")
+        suite_mock.assert_not_called()
+
+    async def test_validate_missing_constraints(self, download_suite_mock, validator):
         """Test that the validator fails when missing required constraints.
 
         Approval criteria:
@@ -86,128 +153,36 @@ class TestValidator:
             1. Validate a suite with a missing constraint.
             2. Verify that the validator raises ValidationError.
         """
-        download_suite_mock.return_value = [
-            {
-                "name": "TestValidator",
-                "priority": 1,
-                "recipes": [
-                    {
-                        "constraints": [
-                            {"key": "ENVIRONMENT", "value": {}},
-                            {"key": "PARAMETERS", "value": {}},
-                            {"key": "COMMAND", "value": "exit 0"},
-                            {"key": "EXECUTE", "value": []},
-                            {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-                        ],
-                        "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7887",
-                        "testCase": {
-                            "id": "test_validate_missing_constraints",
-                            "tracker": "Github",
-                            "url": "https://github.com/eiffel-community/etos-api",
-                        },
-                    }
-                ],
-            }
-        ]  # TEST_RUNNER is missing
+        download_suite_mock.return_value = suite_with_constraints(
+            [c for c in VALID_CONSTRAINTS if c["key"] != "TEST_RUNNER"]
+        )
         self.logger.info("STEP: Validate a suite with a missing constraint.")
-        validator = SuiteValidator()
-        try:
-            await validator.validate("url")
-            exception = False
-        except ValidationError:
-            exception = True
         self.logger.info("STEP: Verify that the validator raises ValidationError.")
-        assert exception is True
+        with pytest.raises(ValidationError):
+            await validator.validate("url")
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    async def test_validate_wrong_types(self, download_suite_mock):
+    @pytest.mark.parametrize("key,value", WRONG_TYPE_CONSTRAINTS)
+    async def test_validate_wrong_types(
+        self, download_suite_mock, validator, key, value
+    ):
         """Test that the validator fails when constraints have the wrong types.
 
         Approval criteria:
             - Suite validator shall not approve a suite wrong constraint types.
 
         Test steps::
-            1. For each constraint.
-                1. Validate constraint with wrong type.
-                2. Verify that the validator raises ValidationError.
+            1. Validate constraint with wrong type.
+            2. Verify that the validator raises ValidationError.
         """
-        base_suite = {
-            "name": "TestValidator",
-            "priority": 1,
-            "recipes": [
-                {
-                    "constraints": [],  # Filled in loop
-                    "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7886",
-                    "testCase": {
-                        "id": "test_validate_wrong_types",
-                        "tracker": "Github",
-                        "url": "https://github.com/eiffel-community/etos-api",
-                    },
-                }
-            ],
-        }
-        constraints = [
-            [
-                {"key": "ENVIRONMENT", "value": "Wrong"},  # Wrong
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": "Wrong"},  # Wrong
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": {"wrong": True}},  # Wrong
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": {"wrong": True}},  # Wrong
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": "Wrong"},  # Wrong
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": "Wrong"},  # Wrong
-            ],
-        ]
-        self.logger.info("STEP: For each constraint.")
-        validator = SuiteValidator()
-        for constraint in constraints:
-            self.logger.info("STEP: Validate constraint with wrong type.")
-            base_suite["recipes"][0]["constraints"] = constraint
-            download_suite_mock.return_value = [base_suite]
-            self.logger.info("STEP: Verify that the validator raises ValidationError.")
-            with pytest.raises(ValidationError):
-                await validator.validate("url")
-
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    async def test_validate_too_many_constraints(self, download_suite_mock):
+        download_suite_mock.return_value = suite_with_constraints(
+            constraints_with_value(key, value)
+        )
+        self.logger.info("STEP: Validate constraint with wrong type.")
+        self.logger.info("STEP: Verify that the validator raises ValidationError.")
+        with pytest.raises(ValidationError):
+            await validator.validate("url")
+
+    async def test_validate_too_many_constraints(self, download_suite_mock, validator):
         """Test that the validator fails when a constraint is defined multiple times.
 
         Approval criteria:
@@ -217,45 +192,17 @@ class TestValidator:
             1. Validate a suite with a constraint defined multiple times.
             2. Verify that the validator raises ValidationError.
         """
-        download_suite_mock.return_value = [
-            {
-                "name": "TestValidator",
-                "priority": 1,
-                "recipes": [
-                    {
-                        "constraints": [
-                            {"key": "ENVIRONMENT", "value": {}},
-                            {"key": "PARAMETERS", "value": {}},
-                            {"key": "TEST_RUNNER", "value": "TestRunner"},
-                            {"key": "TEST_RUNNER", "value": "AnotherTestRunner"},
-                            {"key": "COMMAND", "value": "exit 0"},
-                            {"key": "EXECUTE", "value": []},
-                            {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-                        ],
-                        "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7887",
-                        "testCase": {
-                            "id": "test_validate_too_many_constraints",
-                            "tracker": "Github",
-                            "url": "https://github.com/eiffel-community/etos-api",
-                        },
-                    }
-                ],
-            }
-        ]
+        download_suite_mock.return_value = suite_with_constraints(
+            VALID_CONSTRAINTS + [{"key": "TEST_RUNNER", "value": "AnotherTestRunner"}]
+        )
         self.logger.info(
             "STEP: Validate a suite with a constraint defined multiple times."
         )
-        validator = SuiteValidator()
-        try:
-            await validator.validate("url")
-            exception = False
-        except ValidationError:
-            exception = True
         self.logger.info("STEP: Verify that the validator raises ValidationError.")
-        assert exception is True
+        with pytest.raises(ValidationError):
+            await validator.validate("url")
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    async def test_validate_unknown_constraint(self, download_suite_mock):
+    async def test_validate_unknown_constraint(self, download_suite_mock, validator):
         """Test that the validator fails when an unknown constraint is defined.
 
         Approval criteria:
@@ -265,98 +212,29 @@ class TestValidator:
             1. Validate a suite with an unknown constraint.
             2. Verify that the validator raises ValidationError.
         """
-        download_suite_mock.return_value = [
-            {
-                "name": "TestValidator",
-                "priority": 1,
-                "recipes": [
-                    {
-                        "constraints": [
-                            {"key": "ENVIRONMENT", "value": {}},
-                            {"key": "PARAMETERS", "value": {}},
-                            {"key": "TEST_RUNNER", "value": "TestRunner"},
-                            {"key": "COMMAND", "value": "exit 0"},
-                            {"key": "EXECUTE", "value": []},
-                            {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-                            {"key": "UNKNOWN", "value": "Hello"},
-                        ],
-                        "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7887",
-                        "testCase": {
-                            "id": "test_validate_unknown_constraint",
-                            "tracker": "Github",
-                            "url": "https://github.com/eiffel-community/etos-api",
-                        },
-                    }
-                ],
-            }
-        ]
+        download_suite_mock.return_value = suite_with_constraints(
+            VALID_CONSTRAINTS + [{"key": "UNKNOWN", "value": "Hello"}]
+        )
         self.logger.info("STEP: Validate a suite with an unknown constraint.")
-        validator = SuiteValidator()
-        try:
-            await validator.validate("url")
-            exception = False
-        except ValidationError:
-            exception = True
         self.logger.info("STEP: Verify that the validator raises ValidationError.")
-        assert exception is True
+        with pytest.raises(ValidationError):
+            await validator.validate("url")
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    async def test_validate_empty_constraints(self, download_suite_mock):
+    @pytest.mark.parametrize("key,value", EMPTY_CONSTRAINTS)
+    async def test_validate_empty_constraints(
+        self, download_suite_mock, validator, key, value
+    ):
         """Test that required constraints are not empty.
 
         Approval criteria:
             - Constraints 'TEST_RUNNER', 'CHECKOUT' & 'COMMAND' shall not be empty.
 
         Test steps::
-            1. For each required key.
-                1. Validate a suite without the required key.
+            1. Validate a suite with an empty required key.
         """
-        base_suite = {
-            "name": "TestValidator",
-            "priority": 1,
-            "recipes": [
-                {
-                    "constraints": [],  # Filled below
-                    "id": "131a7499-7ad4-4c4a-8a66-4e9ac95c7892",
-                    "testCase": {
-                        "id": "test_validate_empty_constraints",
-                        "tracker": "Github",
-                        "url": "https://github.com/eiffel-community/etos-api",
-                    },
-                }
-            ],
-        }
-        constraints = [
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": ""},  # Empty
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": ""},  # Empty
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-            ],
-            [
-                {"key": "ENVIRONMENT", "value": {}},
-                {"key": "PARAMETERS", "value": {}},
-                {"key": "COMMAND", "value": "exit 0"},
-                {"key": "TEST_RUNNER", "value": "TestRunner"},
-                {"key": "EXECUTE", "value": []},
-                {"key": "CHECKOUT", "value": []},  # Empty
-            ],
-        ]
-        self.logger.info("STEP: For each required key.")
-        validator = SuiteValidator()
-        for constraint in constraints:
-            base_suite["recipes"][0]["constraints"] = constraint
-            download_suite_mock.return_value = [base_suite]
-            self.logger.info("STEP: Validate a suite without the required key.")
-            with pytest.raises(ValidationError):
-                await validator.validate("url")
+        download_suite_mock.return_value = suite_with_constraints(
+            constraints_with_value(key, value)
+        )
+        self.logger.info("STEP: Validate a suite with an empty required key.")
+        with pytest.raises(ValidationError):
+            await validator.validate("url")
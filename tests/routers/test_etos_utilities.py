@@ -0,0 +1,180 @@
+# Copyright 2021 Axis Communications AB.
+#
+# For a full list of individual contributors, please see the commit history.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for the ETOS router utilities."""
+import asyncio
+import logging
+import pytest
+from etos_lib import ETOS
+from etos_api.library.graphql import GraphqlQueryHandler
+from etos_api.routers.etos.utilities import wait_for_artifact_created
+
+
+@pytest.fixture(scope="module", name="query_handler")
+def fixture_query_handler():
+    """GraphQL query handler, whose queries are replaced by graphql_execute_mock.
+
+    :return: GraphQL query handler.
+    :rtype: :obj:`etos_api.library.graphql.GraphqlQueryHandler`
+    """
+    return GraphqlQueryHandler(ETOS("ETOS API", "localhost", "ETOS API"))
+
+
+class TestEtosUtilities:
+    """Test the ETOS router utilities."""
+
+    logger = logging.getLogger(__name__)
+    pytestmark = pytest.mark.asyncio
+
+    async def test_wait_for_artifact_created_shared(
+        self, graphql_execute_mock, query_handler
+    ):
+        """Test that lookups of the same artifact share one GraphQL query.
+
+        Approval criteria:
+            - Concurrent lookups of the same artifact shall query GraphQL once.
+            - A lookup of an artifact that was just found shall not query GraphQL.
+
+        Test steps::
+            1. Wait for the same artifact created twice, concurrently.
+            2. Verify that both got the artifact and that GraphQL was queried once.
+            3. Wait for the same artifact created again.
+            4. Verify that GraphQL was not queried again.
+        """
+        self.logger.info(
+            "STEP: Wait for the same artifact created twice, concurrently."
+        )
+        first, second = await asyncio.gather(
+            wait_for_artifact_created(query_handler, "pkg:testing/etos", None),
+            wait_for_artifact_created(query_handler, "pkg:testing/etos", None),
+        )
+        self.logger.info(
+            "STEP: Verify that both got the artifact and that GraphQL was queried once."
+        )
+        assert first == second
+        assert first[0]["node"]["data"]["identity"] == "pkg:testing/etos"
+        assert graphql_execute_mock.await_count == 1
+        self.logger.info("STEP: Wait for the same artifact created again.")
+        third = await wait_for_artifact_created(query_handler, "pkg:testing/etos", None)
+        self.logger.info("STEP: Verify that GraphQL was not queried again.")
+        assert third == first
+        assert graphql_execute_mock.await_count == 1
+
+    async def test_wait_for_artifact_created_not_found(
+        self, graphql_execute_mock, query_handler
+    ):
+        """Test that lookups that did not find the artifact are not reused.
+
+        Approval criteria:
+            - A lookup after a failed lookup shall query GraphQL again.
+
+        Test steps::
+            1. Wait for an artifact created that does not exist.
+            2. Verify that the artifact was not found.
+            3. Wait for the artifact created again, after it has been created.
+            4. Verify that the artifact was found.
+        """
+        self.logger.info("STEP: Wait for an artifact created that does not exist.")
+        found = graphql_execute_mock.return_value
+        graphql_execute_mock.return_value = {"artifactCreated": {"edges": []}}
+        artifact = await wait_for_artifact_created(
+            query_handler, "pkg:testing/etos", None, timeout=0.1
+        )
+        self.logger.info("STEP: Verify that the artifact was not found.")
+        assert artifact is None
+        self.logger.info(
+            "STEP: Wait for the artifact created again, after it has been created."
+        )
+        graphql_execute_mock.return_value = found
+        artifact = await wait_for_artifact_created(
+            query_handler, "pkg:testing/etos", None
+        )
+        self.logger.info("STEP: Verify that the artifact was found.")
+        assert artifact == found["artifactCreated"]["edges"]
+
+    async def test_wait_for_artifact_created_cancelled(
+        self, graphql_execute_mock, query_handler
+    ):
+        """Test that a lookup stops when the only request waiting for it is cancelled.
+
+        Approval criteria:
+            - GraphQL shall not be queried after the only waiting request is cancelled.
+
+        Test steps::
+            1. Wait for an artifact created that does not exist yet.
+            2. Cancel the wait.
+            3. Verify that GraphQL is no longer queried.
+        """
+        self.logger.info("STEP: Wait for an artifact created that does not exist yet.")
+        graphql_execute_mock.return_value = {"artifactCreated": {"edges": []}}
+        waiter = asyncio.ensure_future(
+            wait_for_artifact_created(query_handler, "pkg:testing/etos", None)
+        )
+        await asyncio.sleep(0.2)
+        assert graphql_execute_mock.await_count > 0
+        self.logger.info("STEP: Cancel the wait.")
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        polls = graphql_execute_mock.await_count
+        self.logger.info("STEP: Verify that GraphQL is no longer queried.")
+        await asyncio.sleep(0.5)
+        assert graphql_execute_mock.await_count == polls
+
+    async def test_wait_for_artifact_created_joined_late(
+        self, graphql_execute_mock, query_handler
+    ):
+        """Test that a request that joins a lookup late still waits for its own timeout.
+
+        Approval criteria:
+            - A request that joins a lookup shall keep waiting for the artifact
+              until its own timeout, even if the lookup it joined times out earlier.
+
+        Test steps::
+            1. Wait for an artifact created that does not exist yet, with a short timeout.
+            2. Wait for the same artifact created, later and with a longer timeout.
+            3. Create the artifact after the first wait has timed out.
+            4. Verify that the first wait did not find the artifact.
+            5. Verify that the second wait found the artifact.
+        """
+        self.logger.info(
+            "STEP: Wait for an artifact created that does not exist yet, with a short timeout."
+        )
+        found = graphql_execute_mock.return_value
+        graphql_execute_mock.return_value = {"artifactCreated": {"edges": []}}
+        first = asyncio.ensure_future(
+            wait_for_artifact_created(
+                query_handler, "pkg:testing/etos", None, timeout=0.3
+            )
+        )
+        await asyncio.sleep(0.2)
+        self.logger.info(
+            "STEP: Wait for the same artifact created, later and with a longer timeout."
+        )
+        second = asyncio.ensure_future(
+            wait_for_artifact_created(
+                query_handler, "pkg:testing/etos", None, timeout=2
+            )
+        )
+        self.logger.info(
+            "STEP: Create the artifact after the first wait has timed out."
+        )
+        assert await first is None
+        await asyncio.sleep(0.2)
+        graphql_execute_mock.return_value = found
+        self.logger.info("STEP: Verify that the first wait did not find the artifact.")
+        assert first.result() is None
+        self.logger.info("STEP: Verify that the second wait found the artifact.")
+        assert await second == found["artifactCreated"]["edges"]
@@ -15,28 +15,44 @@
 # limitations under the License.
 """ETOS API routers."""
 import logging
-import sys
-from unittest.mock import patch
-from fastapi.testclient import TestClient
-from etos_lib.lib.debug import Debug
-from etos_api.main import APP
-
-logging.basicConfig(level=logging.DEBUG, stream=sys.stdout)
+import time
+from unittest.mock import MagicMock
+import pytest
+import orjson
+from etos_api.library.clients import ETOS_LIBRARY
+
+SUITE = [
+    {
+        "name": "TestRouters",
+        "priority": 1,
+        "recipes": [
+            {
+                "constraints": [
+                    {"key": "ENVIRONMENT", "value": {}},
+                    {"key": "PARAMETERS", "value": {}},
+                    {"key": "COMMAND", "value": "exit 0"},
+                    {"key": "TEST_RUNNER", "value": "TestRunner"},
+                    {"key": "EXECUTE", "value": []},
+                    {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
+                ],
+                "id": "132a7499-7ad4-4c4a-8a66-4e9ac95c7885",
+                "testCase": {
+                    "id": "test_start_etos",
+                    "tracker": "Github",
+                    "url": "https://github.com/eiffel-community/etos-api",
+                },
+            }
+        ],
+    }
+]
 
 
 class TestRouters:
     """Test the routers in etos-api."""
 
     logger = logging.getLogger(__name__)
-    client = TestClient(APP)
 
-    @staticmethod
-    def teardown_method():
-        """Cleanup events from ETOS library debug."""
-        Debug().events_received.clear()
-        Debug().events_published.clear()
-
-    def test_head_on_root_without_redirect(self):
+    def test_head_on_root_without_redirect(self, client):
         """Test that HEAD requests on root return 308 permanent redirect.
 
         Approval criteria:
@@ -47,11 +63,11 @@ class TestRouters:
             2. Verify that status code is 308.
         """
         self.logger.info("STEP: Send a HEAD request to root without allow_redirects.")
-        response = self.client.head("/", allow_redirects=False)
+        response = client.head("/", allow_redirects=False)
         self.logger.info("STEP: Verify that status code is 308.")
         assert response.status_code == 308
 
-    def test_head_on_root_with_redirect(self):
+    def test_head_on_root_with_redirect(self, client):
         """Test that HEAD requests on root return 204 when redirected.
 
         Approval criteria:
@@ -62,11 +78,11 @@ class TestRouters:
             2. Verify that status code is 204.
         """
         self.logger.info("STEP: Send a HEAD request to root with allow_redirects.")
-        response = self.client.head("/", allow_redirects=True)
+        response = client.head("/", allow_redirects=True)
         self.logger.info("STEP: Verify that status code is 204.")
         assert response.status_code == 204
 
-    def test_post_on_root_without_redirect(self):
+    def test_post_on_root_without_redirect(self, client):
         """Test that POST requests on root return 308 permanent redirect.
 
         Approval criteria:
@@ -77,16 +93,12 @@ class TestRouters:
             2. Verify that status code is 308.
         """
         self.logger.info("STEP: Send a POST request to root without allow_redirects.")
-        response = self.client.post("/", allow_redirects=False)
+        response = client.post("/", allow_redirects=False)
         self.logger.info("STEP: Verify that status code is 308.")
         assert response.status_code == 308
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    @patch("etos_api.library.graphql.GraphqlQueryHandler.execute")
-    @patch("etos_api.routers.environment_provider.router.aiohttp.ClientSession")
-    def test_post_on_root_with_redirect(
-        self, mock_client, graphql_execute_mock, download_suite_mock
-    ):
+    @pytest.mark.usefixtures("client_session_mock", "graphql_execute_mock")
+    def test_post_on_root_with_redirect(self, client, download_suite_mock):
         """Test that POST requests to / redirects and starts ETOS tests.
 
         Approval criteria:
@@ -96,45 +108,10 @@ class TestRouters:
             1. Send a POST request to root with allow_redirects.
             2. Verify that the status code is 200.
         """
-        mock_client().__aenter__.return_value = mock_client
-        mock_client.post().__aenter__.return_value = mock_client
-        mock_client.status = 200
-        mock_client.post.reset_mock()
-
-        graphql_execute_mock.return_value = {
-            "artifactCreated": {
-                "edges": [
-                    {"node": {"meta": {"id": "cda58701-5614-49bf-9101-11b71a5721fb"}}}
-                ]
-            }
-        }
-        download_suite_mock.return_value = [
-            {
-                "name": "TestRouters",
-                "priority": 1,
-                "recipes": [
-                    {
-                        "constraints": [
-                            {"key": "ENVIRONMENT", "value": {}},
-                            {"key": "PARAMETERS", "value": {}},
-                            {"key": "COMMAND", "value": "exit 0"},
-                            {"key": "TEST_RUNNER", "value": "TestRunner"},
-                            {"key": "EXECUTE", "value": []},
-                            {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-                        ],
-                        "id": "132a7499-7ad4-4c4a-8a66-4e9ac95c7885",
-                        "testCase": {
-                            "id": "test_start_etos",
-                            "tracker": "Github",
-                            "url": "https://github.com/eiffel-community/etos-api",
-                        },
-                    }
-                ],
-            }
-        ]
+        download_suite_mock.return_value = SUITE
 
         self.logger.info("STEP: Send a POST request to root with allow_redirects.")
-        response = self.client.post(
+        response = client.post(
             "/",
             json={
                 "artifact_identity": "pkg:testing/etos",
@@ -145,10 +122,8 @@ class TestRouters:
         self.logger.info("STEP: Verify that the status code is 200.")
         assert response.status_code == 200
 
-    @patch("etos_api.library.validator.SuiteValidator._download_suite")
-    @patch("etos_api.library.graphql.GraphqlQueryHandler.execute")
-    @patch("etos_api.routers.environment_provider.router.aiohttp.ClientSession")
-    def test_start_etos(self, mock_client, graphql_execute_mock, download_suite_mock):
+    @pytest.mark.usefixtures("graphql_execute_mock")
+    def test_start_etos(self, client, client_session_mock, download_suite_mock, debug):
         """Test that POST requests to /etos attempts to start ETOS tests.
 
         Approval criteria:
@@ -162,44 +137,9 @@ class TestRouters:
             3. Verify that a TERCC was sent.
             4. Verify that the environment provider was configured.
         """
-        mock_client().__aenter__.return_value = mock_client
-        mock_client.post().__aenter__.return_value = mock_client
-        mock_client.status = 200
-        mock_client.post.reset_mock()
-
-        graphql_execute_mock.return_value = {
-            "artifactCreated": {
-                "edges": [
-                    {"node": {"meta": {"id": "cda58701-5614-49bf-9101-11b71a5721fb"}}}
-                ]
-            }
-        }
-        download_suite_mock.return_value = [
-            {
-                "name": "TestRouters",
-                "priority": 1,
-                "recipes": [
-                    {
-                        "constraints": [
-                            {"key": "ENVIRONMENT", "value": {}},
-                            {"key": "PARAMETERS", "value": {}},
-                            {"key": "COMMAND", "value": "exit 0"},
-                            {"key": "TEST_RUNNER", "value": "TestRunner"},
-                            {"key": "EXECUTE", "value": []},
-                            {"key": "CHECKOUT", "value": ["echo 'checkout'"]},
-                        ],
-                        "id": "132a7499-7ad4-4c4a-8a66-4e9ac95c7885",
-                        "testCase": {
-                            "id": "test_start_etos",
-                            "tracker": "Github",
-                            "url": "https://github.com/eiffel-community/etos-api",
-                        },
-                    }
-                ],
-            }
-        ]
+        download_suite_mock.return_value = SUITE
         self.logger.info("STEP: Send a POST request to etos.")
-        response = self.client.post(
+        response = client.post(
             "/etos",
             json={
                 "artifact_identity": "pkg:testing/etos",
@@ -209,29 +149,76 @@ class TestRouters:
         self.logger.info("STEP: Verify that the status code is 200.")
         assert response.status_code == 200
         self.logger.info("STEP: Verify that a TERCC was sent.")
-        debug = Debug()
-        tercc = None
-        for event in debug.events_published:
-            if event.meta.type == "EiffelTestExecutionRecipeCollectionCreatedEvent":
-                tercc = event
-                break
+        tercc = next(
+            (
+                event
+                for event in debug.events_published
+                if event.meta.type == "EiffelTestExecutionRecipeCollectionCreatedEvent"
+            ),
+            None,
+        )
         assert tercc is not None
         assert response.json().get("tercc") == tercc.meta.event_id
         self.logger.info("STEP: Verify that the environment provider was configured.")
-        mock_client.post.assert_called_once_with(
+        client_session_mock.post.assert_called_once_with(
             f"{debug.environment_provider}/configure",
+            data=orjson.dumps(
+                {
+                    "suite_id": tercc.meta.event_id,
+                    "dataset": {},
+                    "execution_space_provider": "default",
+                    "iut_provider": "default",
+                    "log_area_provider": "default",
+                }
+            ),
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+
+    @pytest.mark.parametrize(
+        "publisher",
+        [
+            MagicMock(is_alive=MagicMock(return_value=False)),
+            MagicMock(
+                is_alive=MagicMock(return_value=True),
+                _channel=MagicMock(is_open=False),
+            ),
+        ],
+        ids=["never_connected", "reconnecting"],
+    )
+    @pytest.mark.usefixtures("client_session_mock", "graphql_execute_mock")
+    def test_start_etos_publisher_not_connected(
+        self, client, download_suite_mock, monkeypatch, publisher
+    ):
+        """Test that POST requests to /etos fail while the publisher is not connected.
+
+        Approval criteria:
+            - POST requests to ETOS shall return 503 if events can not be sent.
+            - POST requests to ETOS shall not send a TERCC if events can not be sent.
+
+        Test steps::
+            1. Disconnect the event publisher.
+            2. Send a POST request to etos.
+            3. Verify that the status code is 503 and that no TERCC was sent.
+        """
+        download_suite_mock.return_value = SUITE
+        self.logger.info("STEP: Disconnect the event publisher.")
+        monkeypatch.delenv("ETOS_DISABLE_SENDING_EVENTS")
+        monkeypatch.setattr(ETOS_LIBRARY, "publisher", publisher)
+        self.logger.info("STEP: Send a POST request to etos.")
+        response = client.post(
+            "/etos",
             json={
-                "suite_id": tercc.meta.event_id,
-                "dataset": {},
-                "execution_space_provider": "default",
-                "iut_provider": "default",
-                "log_area_provider": "default",
+                "artifact_identity": "pkg:testing/etos",
+                "test_suite_url": "http://localhost/my_test.json",
             },
-            headers={"Content-Type": "application/json", "Accept": "application/json"},
         )
+        self.logger.info(
+            "STEP: Verify that the status code is 503 and that no TERCC was sent."
+        )
+        assert response.status_code == 503
+        assert not ETOS_LIBRARY.debug.events_published
 
-    @patch("etos_api.routers.environment_provider.router.aiohttp.ClientSession")
-    def test_configure_environment_provider(self, mock_client):
+    def test_configure_environment_provider(self, client, client_session_mock, debug):
         """Test that configure requests are proxied to the environment provider.
 
         Approval criteria:
@@ -243,13 +230,8 @@ class TestRouters:
             2. Verify that the status code is 204.
             3. Verify that the request was sent to the environment provider.
         """
-        mock_client().__aenter__.return_value = mock_client
-        mock_client.post().__aenter__.return_value = mock_client
-        mock_client.status = 200
-        mock_client.post.reset_mock()
-
         self.logger.info("STEP: Send a POST request to configure.")
-        response = self.client.post(
+        response = client.post(
             "environment_provider/configure",
             json={
                 "suite_id": "f5d5bc7b-c6b8-406f-a997-43c8217e32c1",
@@ -266,20 +248,62 @@ class TestRouters:
         self.logger.info(
             "STEP: Verify that the request was sent to the environment provider."
         )
-        debug = Debug()
-        mock_client.post.assert_called_once_with(
+        client_session_mock.post.assert_called_once_with(
             f"{debug.environment_provider}/configure",
+            data=orjson.dumps(
+                {
+                    "suite_id": "f5d5bc7b-c6b8-406f-a997-43c8217e32c1",
+                    "dataset": {},
+                    "execution_space_provider": "execution_space",
+                    "iut_provider": "iut",
+                    "log_area_provider": "log_area",
+                }
+            ),
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+
+    def test_configure_environment_provider_retry_after(
+        self, client, client_session_mock, monkeypatch
+    ):
+        """Test that a long Retry-After does not hold a configure request past its timeout.
+
+        Approval criteria:
+            - Configure requests shall fail with 400 when the HTTP timeout expires,
+              even if the environment provider asks to retry much later.
+
+        Test steps::
+            1. Make the environment provider respond 503 with a long Retry-After.
+            2. Send a POST request to configure, with a short HTTP timeout.
+            3. Verify that the status code is 400, and that it failed in time.
+        """
+        self.logger.info(
+            "STEP: Make the environment provider respond 503 with a long Retry-After."
+        )
+        response = client_session_mock.post.return_value.__aenter__.return_value
+        response.status = 503
+        response.headers = {"Retry-After": "3600"}
+        monkeypatch.setenv("ETOS_DEFAULT_HTTP_TIMEOUT", "1")
+        self.logger.info(
+            "STEP: Send a POST request to configure, with a short HTTP timeout."
+        )
+        start = time.monotonic()
+        response = client.post(
+            "environment_provider/configure",
             json={
                 "suite_id": "f5d5bc7b-c6b8-406f-a997-43c8217e32c1",
                 "dataset": {},
-                "execution_space_provider": "execution_space",
                 "iut_provider": "iut",
+                "execution_space_provider": "execution_space",
                 "log_area_provider": "log_area",
             },
-            headers={"Content-Type": "application/json", "Accept": "application/json"},
         )
+        self.logger.info(
+            "STEP: Verify that the status code is 400, and that it failed in time."
+        )
+        assert response.status_code == 400
+        assert time.monotonic() - start < 5
 
-    def test_selftest_get_ping(self):
+    def test_selftest_get_ping(self, client):
         """Test that selftest ping with HTTP GET pings the system.
 
         Approval criteria:
@@ -290,11 +314,11 @@ class TestRouters:
             2. Verify that status code is 204.
         """
         self.logger.info("STEP: Send a GET request to selftest ping.")
-        response = self.client.get("/selftest/ping")
+        response = client.get("/selftest/ping")
         self.logger.info("STEP: Verify that the status code is 204.")
         assert response.status_code == 204
 
-    def test_selftest_head_ping(self):
+    def test_selftest_head_ping(self, client):
         """Test that selftest ping with HTTP HEAD pings the system.
 
         Approval criteria:
@@ -305,6 +329,6 @@ class TestRouters:
             2. Verify that the status code is 204.
         """
         self.logger.info("STEP: Send a HEAD request to selftest ping.")
-        response = self.client.head("/selftest/ping")
+        response = client.head("/selftest/ping")
         self.logger.info("STEP: Verify that the status code is 204.")
         assert response.status_code == 204